@@ -1,86 +1,336 @@
 import argparse
 import datetime
+import email.utils
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
 import gzip
+import logging
+import mmap
 import os
-import re
 import shutil # For decompressing
+import socket
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Optional .Z (LZW) decoders for RINEX 2 files: ncompress (C extension, fastest), then unlzw3 (pure Python)
+try:
+    import ncompress
+except ImportError:
+    ncompress = None
+try:
+    import unlzw3
+except ImportError:
+    unlzw3 = None
+
+try:
+    from zlib import _ZlibDecompressor # Python 3.12+, the decompressor gzip's own reader is built on
+except ImportError:
+    _ZlibDecompressor = None
 
 # --- Configuration (You might adjust these if IGS URL structures change) ---
 CDDIS_BASE_URL = "https://cddis.nasa.gov/archive/gnss/data/daily"
 MGEX_NAV_BASE_URL = "https://cddis.nasa.gov/archive/gnss/data/campaign/mgex/daily/rinex3"
+# Daily OBS file per RINEX version, relative to CDDIS_BASE_URL/{year}/{doy}/.
+# RINEX 3 uses the short Compact RINEX name ssssDDD0.YYo.crx.gz; long names such as
+# ALGO00CAN_R_20230010000_01D_30S_MO.crx.gz also exist and may need adjusting here.
+# RINEX 2.11 is usually Unix-compressed (.Z).
+OBS_PATTERNS = {
+    "3": "{yy}o/{sid}{doy}0.{yy}o.crx.gz",
+    "2": "{yy}d/{sid}{doy}0.{yy}d.Z",
+}
+# Merged multi-GNSS broadcast ephemeris, relative to MGEX_NAV_BASE_URL/{year}/{doy}/
+NAV_PATTERN = "BRDM00{ac}_S_{year}{doy}0000_01D_MN.rnx.gz"
+# Analysis centers publishing merged BRDM navigation files, in order of preference
+NAV_CANDIDATES = ["DLR", "GDE", "IGN", "WHU", "BKG"]
+DOWNLOAD_CHUNK_SIZE = 128 * 1024 # Bytes per streamed read/write in download_file()
+FILE_BUFFER_SIZE = 1 << 20 # Buffer for downloaded/decompressed files, far fewer syscalls than the 8 KiB default
+
+log = logging.getLogger("igs")
+
+# --- HTTP Session (shared so repeated requests to CDDIS reuse keep-alive connections) ---
+# Keep idle pooled sockets alive between requests, on top of urllib3's defaults (TCP_NODELAY)
+_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+class _KeepAliveHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections use the socket options above."""
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = _SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+SESSION = requests.Session()
+# Enough pooled connections for the OBS download plus one HEAD probe per NAV candidate
+_adapter = _KeepAliveHTTPAdapter(pool_connections=4, pool_maxsize=len(NAV_CANDIDATES) + 1,
+                                 max_retries=Retry(total=3, backoff_factor=0.5,
+                                                   status_forcelist=[500, 502, 503, 504]))
+SESSION.mount("https://", _adapter)
+
+# --- RINEX header parsing ---
+_TFO_MARKER = b"TIME OF FIRST OBS"
+_END_OF_HEADER_MARKER = b"END OF HEADER"
+_HEADER_MAX_LINES = 120 # RINEX headers are far shorter; stop scanning files without a proper header
+_LABEL_COLUMN = 60 # Header labels live in columns 61-80
+
+_GZIP_WBITS = 16 + zlib.MAX_WBITS # Tells zlib to expect a gzip header and trailer
 
 # --- Helper Functions ---
 
+def _find_label_mmap(mm, marker, end):
+    """Returns the start of the first line in mm[:end] whose header label is marker, or -1."""
+    idx = mm.find(marker, 0, end)
+    while idx != -1:
+        line_start = mm.rfind(b"\n", 0, idx) + 1
+        if idx - line_start == _LABEL_COLUMN: # Only a real header label, not the text inside a comment
+            return line_start
+        idx = mm.find(marker, idx + 1, end)
+    return -1
+
+def _find_tfo_line_mmap(mm):
+    """Returns the 'TIME OF FIRST OBS' header line from a memory-mapped RINEX file, or None."""
+    # Apply the same _HEADER_MAX_LINES cap as the line scan, whatever the line endings
+    end = 0
+    for _ in range(_HEADER_MAX_LINES):
+        newline = mm.find(b"\n", end)
+        if newline == -1:
+            end = len(mm)
+            break
+        end = newline + 1
+    end_of_header = _find_label_mmap(mm, _END_OF_HEADER_MARKER, end)
+    if end_of_header != -1:
+        end = end_of_header
+    line_start = _find_label_mmap(mm, _TFO_MARKER, end)
+    if line_start == -1:
+        return None
+    line_end = mm.find(b"\n", line_start)
+    return mm[line_start:line_end if line_end != -1 else len(mm)]
+
+def _find_tfo_line_scan(f):
+    """Line-by-line fallback of _find_tfo_line_mmap() for files that can't be memory-mapped."""
+    for i, line in enumerate(f):
+        if i >= _HEADER_MAX_LINES:
+            break
+        label = line[_LABEL_COLUMN:80]
+        if label.startswith(_END_OF_HEADER_MARKER):
+            break
+        if label.startswith(_TFO_MARKER):
+            return line
+    return None
+
 def get_obs_date_from_rinex(rinex_rover_file):
     """
     Parses the 'TIME OF FIRST OBS' from a RINEX 3.x header.
     Returns a datetime object.
     """
     try:
-        with open(rinex_rover_file, 'r') as f:
-            for line in f:
-                if "TIME OF FIRST OBS" in line:
-                    match = re.search(r'(\d{4})\s+(\d{1,2})\s+(\d{1,2})\s+(\d{1,2})\s+(\d{1,2})\s+([\d\.]+)', line)
-                    if match:
-                        year, month, day, hour, minute, second_full = match.groups()
-                        second = int(float(second_full)) # Truncate fractional seconds for datetime object
-                        microsecond = int((float(second_full) - second) * 1_000_000)
-                        return datetime.datetime(int(year), int(month), int(day),
-                                                 int(hour), int(minute), int(second), microsecond,
-                                                 tzinfo=datetime.timezone.utc)
-                    else:
-                        print(f"Could not parse date from 'TIME OF FIRST OBS' line: {line.strip()}")
-                        return None
-            print("ERROR: 'TIME OF FIRST OBS' line not found in RINEX header.")
+        with open(rinex_rover_file, 'rb') as f: # Bytes avoid decoding the whole header
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    line = _find_tfo_line_mmap(mm)
+            except (ValueError, OSError): # Empty files and pipes can't be mapped
+                line = _find_tfo_line_scan(f)
+        if line is None:
+            log.error("'TIME OF FIRST OBS' line not found in RINEX header.")
+            return None
+        # Fixed-column format (5I6, F13.7): year, month, day, hour, minute, second
+        try:
+            year, month, day = int(line[0:6]), int(line[6:12]), int(line[12:18])
+            hour, minute = int(line[18:24]), int(line[24:30])
+            second_full = float(line[30:43])
+            second = int(second_full) # Truncate fractional seconds for datetime object
+            microsecond = int((second_full - second) * 1_000_000)
+            return datetime.datetime(year, month, day, hour, minute, second, microsecond,
+                                     tzinfo=datetime.timezone.utc)
+        except ValueError:
+            log.error("Could not parse date from 'TIME OF FIRST OBS' line: %s", line.decode('ascii', 'replace').strip())
             return None
     except FileNotFoundError:
-        print(f"ERROR: Rover RINEX file not found: {rinex_rover_file}")
+        log.error("Rover RINEX file not found: %s", rinex_rover_file)
         return None
     except Exception as e:
-        print(f"ERROR: Could not read or parse rover RINEX file: {e}")
+        log.error("Could not read or parse rover RINEX file: %s", e)
         return None
 
-def get_doy(dt_object):
-    """Converts a datetime object to Day Of Year (DOY)."""
-    return dt_object.timetuple().tm_yday
-
-def download_file(url, output_path):
-    """Downloads a file from a URL to the specified output path."""
-    print(f"Attempting to download: {url}")
+def download_file(url, output_path, gunzip=False):
+    """
+    Downloads a file from a URL to the specified output path.
+    If gunzip is True, the .gz stream is decompressed on the fly and only the
+    decompressed data is written to output_path (no intermediate .gz on disk).
+    An existing output_path is reused where possible: plain downloads are skipped
+    when the size matches the server's and resumed with a Range request when
+    shorter; decompressed downloads are skipped if the server reports the file
+    as not modified since.
+    """
+    log.debug("Attempting to download: %s", url)
+    # Decompressed output goes to a temporary file so output_path is only ever a complete file
+    write_path = f"{output_path}.part" if gunzip else output_path
     try:
-        response = requests.get(url, stream=True, timeout=60) # Added timeout
+        headers = {}
+        if os.path.exists(output_path):
+            if gunzip:
+                # The decompressed size can't be compared with the remote .gz, so ask the server instead
+                headers["If-Modified-Since"] = email.utils.formatdate(os.path.getmtime(output_path), usegmt=True)
+            else:
+                local_size = os.path.getsize(output_path)
+                try:
+                    head = SESSION.head(url, timeout=10, allow_redirects=True)
+                    head.raise_for_status()
+                except requests.exceptions.RequestException as head_err:
+                    # Can't compare with the remote file, so just fetch it again in full
+                    log.debug("HEAD request failed (%s), downloading in full: %s", head_err, url)
+                    head = None
+                if head is not None:
+                    try:
+                        remote_size = int(head.headers.get("Content-Length", -1))
+                    except ValueError:
+                        remote_size = -1 # Unusable length: neither skip nor resume
+                    if local_size == remote_size:
+                        log.info("Already downloaded, skipping: %s", output_path)
+                        return True
+                    # Only resume if the remote file hasn't been republished since our partial copy
+                    # was last written; otherwise the new tail would be spliced onto the old head.
+                    last_modified = head.headers.get("Last-Modified")
+                    try:
+                        remote_mtime = email.utils.parsedate_to_datetime(last_modified).timestamp()
+                    except (TypeError, ValueError):
+                        remote_mtime = None
+                    if (0 < local_size < remote_size and remote_mtime is not None
+                            and remote_mtime <= os.path.getmtime(output_path)):
+                        headers["Range"] = f"bytes={local_size}-"
+                        # If-Range makes the server send the whole file (200) should it change between
+                        # this HEAD and the GET. Weak ETags aren't allowed in If-Range.
+                        etag = head.headers.get("ETag")
+                        headers["If-Range"] = etag if etag and not etag.startswith("W/") else last_modified
+
+        response = SESSION.get(url, stream=True, timeout=60, headers=headers) # Added timeout
+        if response.status_code == 304:
+            log.info("Not modified since last download, skipping: %s", output_path)
+            return True
         response.raise_for_status()  # Raises an HTTPError for bad responses (4XX or 5XX)
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        print(f"Successfully downloaded to: {output_path}")
+
+        # 206 means the server honoured our Range request; a 200 sends the whole file again
+        mode = 'ab' if response.status_code == 206 else 'wb'
+        if mode == 'ab':
+            log.debug("Resuming download at byte %d: %s", local_size, output_path)
+        with open(write_path, mode, buffering=FILE_BUFFER_SIZE) as f:
+            if gunzip:
+                # decode_content only strips HTTP Content-Encoding; the file's own gzip layer is left for GzipFile
+                response.raw.decode_content = True
+                gunzip_stream(response.raw, f, DOWNLOAD_CHUNK_SIZE)
+            else:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+        if gunzip:
+            os.replace(write_path, output_path)
+            log.info("Successfully downloaded and decompressed to: %s", output_path)
+        else:
+            log.info("Successfully downloaded to: %s", output_path)
         return True
     except requests.exceptions.HTTPError as http_err:
-        print(f"HTTP error occurred: {http_err} (URL: {url})")
+        log.error("HTTP error occurred: %s (URL: %s)", http_err, url)
     except requests.exceptions.ConnectionError as conn_err:
-        print(f"Connection error occurred: {conn_err} (URL: {url})")
+        log.error("Connection error occurred: %s (URL: %s)", conn_err, url)
     except requests.exceptions.Timeout as timeout_err:
-        print(f"Timeout occurred: {timeout_err} (URL: {url})")
+        log.error("Timeout occurred: %s (URL: %s)", timeout_err, url)
     except requests.exceptions.RequestException as req_err:
-        print(f"An error occurred during request: {req_err} (URL: {url})")
+        log.error("An error occurred during request: %s (URL: %s)", req_err, url)
+    except Urllib3HTTPError as stream_err: # Raised by response.raw reads, which requests does not wrap
+        log.error("Error while streaming download: %s (URL: %s)", stream_err, url)
+    except (gzip.BadGzipFile, zlib.error, EOFError) as gz_err:
+        log.error("Could not decompress download: %s (URL: %s)", gz_err, url)
+    if gunzip and os.path.exists(write_path):
+        os.remove(write_path) # Don't leave a truncated decompressed file behind
     return False
 
-def decompress_gz_file(gz_file_path, output_file_path):
-    """Decompresses a .gz file."""
-    print(f"Decompressing: {gz_file_path}")
+def url_exists(url):
+    """Checks with a HEAD request whether a URL is available (HTTP 200)."""
     try:
-        with gzip.open(gz_file_path, 'rb') as f_in:
-            with open(output_file_path, 'wb') as f_out:
-                shutil.copyfileobj(f_in, f_out)
-        print(f"Successfully decompressed to: {output_file_path}")
-        os.remove(gz_file_path) # Remove the .gz file after decompression
-        print(f"Removed compressed file: {gz_file_path}")
+        response = SESSION.head(url, timeout=10, allow_redirects=True)
+        return response.status_code == 200
+    except requests.exceptions.RequestException:
+        return False
+
+def download_first_available(candidates):
+    """
+    HEAD-probes a list of (url, output_path) candidates in parallel and downloads
+    (with inline gunzip) the first one, in list order, that answers 200. If that
+    download fails, the next available candidate is tried.
+    Returns the output path of the downloaded file, or None if none succeeded.
+    """
+    executor = ThreadPoolExecutor(max_workers=len(candidates))
+    try:
+        probes = [(executor.submit(url_exists, url), url, output_path)
+                  for url, output_path in candidates]
+        # Probes run concurrently, but results are taken in preference order so the same
+        # analysis center is picked on every run whenever its file is available
+        for future, url, output_path in probes:
+            if future.result() and download_file(url, output_path, gunzip=True):
+                return output_path
+        return None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True) # Don't wait on probes we no longer need
+
+def gunzip_stream(f_in, f_out, chunk_size):
+    """
+    Decompresses the gzip stream read from f_in into f_out, chunk_size bytes at a time.
+    Uses zlib._ZlibDecompressor directly where available, which skips the per-read
+    bookkeeping of gzip.GzipFile; falls back to GzipFile on older Pythons.
+    """
+    if _ZlibDecompressor is None:
+        with gzip.GzipFile(fileobj=f_in, mode='rb') as gz:
+            shutil.copyfileobj(gz, f_out, length=chunk_size)
+        return
+
+    decompressor = _ZlibDecompressor(wbits=_GZIP_WBITS)
+    in_member = False
+    while data := f_in.read(chunk_size):
+        while data:
+            if not in_member:
+                data = data.lstrip(b"\0") # gzip allows zero padding after a member
+                if not data:
+                    break
+                in_member = True
+            f_out.write(decompressor.decompress(data))
+            if not decompressor.eof:
+                break
+            # End of one gzip member; any leftover input starts the next one
+            data = decompressor.unused_data
+            decompressor = _ZlibDecompressor(wbits=_GZIP_WBITS)
+            in_member = False
+    if in_member:
+        raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+
+def decompress_Z_file(z_file_path, output_file_path):
+    """
+    Decompresses a Unix compress (.Z) file using ncompress or unlzw3.
+    The .Z file is kept so a re-run can skip downloading it again.
+    """
+    if ncompress is None and unlzw3 is None:
+        log.warning("No .Z decoder installed (pip install ncompress or unlzw3). Please decompress %s manually (e.g., using 'uncompress' or 7-Zip).", z_file_path)
+        return False
+    log.debug("Decompressing: %s", z_file_path)
+    # Decode into a temporary file so output_file_path is only ever a complete file
+    part_path = f"{output_file_path}.part"
+    try:
+        if ncompress is not None:
+            with open(z_file_path, 'rb', buffering=FILE_BUFFER_SIZE) as f_in:
+                with open(part_path, 'wb', buffering=FILE_BUFFER_SIZE) as f_out:
+                    ncompress.decompress(f_in, f_out)
+        else:
+            with open(z_file_path, 'rb') as f_in:
+                data = unlzw3.unlzw(f_in.read())
+            with open(part_path, 'wb') as f_out:
+                f_out.write(data)
+        os.replace(part_path, output_file_path)
+        log.info("Successfully decompressed to: %s", output_file_path)
         return True
     except FileNotFoundError:
-        print(f"ERROR: Compressed file not found for decompression: {gz_file_path}")
+        log.error("Compressed file not found for decompression: %s", z_file_path)
     except Exception as e:
-        print(f"ERROR: Could not decompress file {gz_file_path}: {e}")
+        log.error("Could not decompress file %s: %s", z_file_path, e)
+    if os.path.exists(part_path):
+        os.remove(part_path) # Don't leave a truncated decompressed file behind
     return False
 
 # --- Main Script Logic ---
@@ -90,105 +340,79 @@ def main():
     parser.add_argument("--station_id", required=True, help="4-character IGS station ID (e.g., dhak).")
     parser.add_argument("--output_dir", required=True, help="Directory to save downloaded and decompressed files.")
     # Optional argument to specify RINEX version for OBS file if needed
-    parser.add_argument("--rinex_obs_version", default="3", choices=["2", "3"],
+    parser.add_argument("--rinex_obs_version", default="3", choices=sorted(OBS_PATTERNS),
                         help="RINEX version for observation file (2 for RINEX 2.11, 3 for RINEX 3.x, default: 3).")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("--quiet", action="store_true", help="Only report warnings and errors.")
+    verbosity.add_argument("--verbose", action="store_true", help="Also report per-file progress details.")
 
     args = parser.parse_args()
 
+    log_level = logging.WARNING if args.quiet else logging.DEBUG if args.verbose else logging.INFO
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s")
+    log.setLevel(log_level) # Only our own messages; keeps urllib3's debug output out of --verbose
+
     # Create output directory if it doesn't exist
-    if not os.path.exists(args.output_dir):
-        os.makedirs(args.output_dir)
-        print(f"Created output directory: {args.output_dir}")
+    os.makedirs(args.output_dir, exist_ok=True)
 
     # 1. Get observation date from rover RINEX
     obs_datetime = get_obs_date_from_rinex(args.rinex_rover_file)
     if not obs_datetime:
         return
 
-    year = obs_datetime.year
-    yy = str(year)[-2:] # 2-digit year
-    doy = get_doy(obs_datetime)
-    doy_str = f"{doy:03d}" # 3-digit DOY (e.g., 001, 143)
+    # 4-digit year, 2-digit year and 3-digit DOY (e.g., 001, 143) from a single format call
+    year_str, yy, doy_str = obs_datetime.strftime("%Y %y %j").split()
+    year = int(year_str)
     station_id_lower = args.station_id.lower()
 
-    print(f"\nRover Observation Start: {obs_datetime.strftime('%Y-%m-%d %H:%M:%S UTC')}")
-    print(f"Year: {year}, Day of Year: {doy_str}, Station: {station_id_lower.upper()}")
-
-    # 2. Construct URLs and download Observation (OBS) file
-    obs_filename_gz = ""
-    obs_final_filename = ""
-    obs_url = ""
-
-    if args.rinex_obs_version == "3":
-        # Try RINEX 3.x Compact RINEX first (common)
-        # Example: https://cddis.nasa.gov/archive/gnss/data/daily/2023/001/23o/ALGO00CAN_R_20230010000_01D_30S_MO.crx.gz
-        # The exact daily RINEX 3 OBS filename can vary. This is one common pattern for high-rate or combined files.
-        # A more reliable pattern for daily observation data might be station-specific.
-        # Example: https://cddis.nasa.gov/archive/gnss/data/daily/2023/001/23o/algo0010.23o.crx.gz (older pattern)
-        # For this script, we'll try a common pattern, but this might need adjustment.
-        # Using a pattern that's often available: ssssDDD0.YYo.crx.gz
-        obs_filename_stem = f"{station_id_lower}{doy_str}0.{yy}o"
-        obs_filename_crx_gz = f"{obs_filename_stem}.crx.gz"
-        obs_url = f"{CDDIS_BASE_URL}/{year}/{doy_str}/{yy}o/{obs_filename_crx_gz}"
-        obs_filename_gz = obs_filename_crx_gz
-        obs_final_filename = f"{obs_filename_stem}.crx"
-    elif args.rinex_obs_version == "2":
-        # RINEX 2.11
-        obs_filename_stem = f"{station_id_lower}{doy_str}0.{yy}d" # e.g., dhak1430.25d
-        obs_filename_211_gz = f"{obs_filename_stem}.Z" # Often .Z for RINEX 2
-        obs_url = f"{CDDIS_BASE_URL}/{year}/{doy_str}/{yy}d/{obs_filename_211_gz}"
-        print(f"Warning: RINEX 2.11 uses .Z compression. This script handles .gz. Manual decompression of {obs_filename_211_gz} might be needed if download succeeds.")
-        obs_filename_gz = obs_filename_211_gz # Placeholder, decompression won't work if it's .Z
-        obs_final_filename = obs_filename_stem
-
-
-    obs_dl_path_gz = os.path.join(args.output_dir, obs_filename_gz)
-    obs_dl_path_final = os.path.join(args.output_dir, obs_final_filename)
-
-    if download_file(obs_url, obs_dl_path_gz):
-        if args.rinex_obs_version == "3" and obs_filename_gz.endswith(".crx.gz"): # Only decompress if it's .gz
-            decompress_gz_file(obs_dl_path_gz, obs_dl_path_final)
-        elif args.rinex_obs_version == "2" and obs_filename_gz.endswith(".Z"):
-             print(f"Downloaded {obs_dl_path_gz}. Please decompress it manually (e.g., using 'uncompress' or 7-Zip).")
-        else:
-            print(f"Downloaded {obs_dl_path_gz}. Not attempting automated decompression for this extension.")
-    else:
-        print(f"Failed to download OBS file. Please check URL or try another IGS source if CDDIS is down.")
-
+    log.info("Rover Observation Start: %s", obs_datetime.strftime('%Y-%m-%d %H:%M:%S UTC'))
+    log.info("Year: %s, Day of Year: %s, Station: %s", year, doy_str, station_id_lower.upper())
 
-    # 3. Construct URL and download Navigation (NAV) file (Multi-GNSS Broadcast Ephemeris)
-    # Common pattern: BRDM00DLR_S_YYYYDDD0000_01D_MN.rnx.gz
-    # Some MGEX files might use BRDM00GDE_S... or other analysis center codes. DLR is common.
-    nav_filename_stem = f"BRDM00DLR_S_{year}{doy_str}0000_01D_MN"
-    nav_filename_rnx_gz = f"{nav_filename_stem}.rnx.gz" # RINEX 3 NAV
-    nav_url = f"{MGEX_NAV_BASE_URL}/{year}/{doy_str}/{nav_filename_rnx_gz}"
+    # 2. Construct URL for the Observation (OBS) file
+    obs_rel_path = OBS_PATTERNS[args.rinex_obs_version].format(sid=station_id_lower, doy=doy_str, yy=yy)
+    obs_url = f"{CDDIS_BASE_URL}/{year}/{doy_str}/{obs_rel_path}"
+    obs_filename = os.path.basename(obs_rel_path)
+    obs_dl_path_final = os.path.join(args.output_dir, os.path.splitext(obs_filename)[0])
+    # .gz is decompressed while downloading; .Z is saved as-is and decoded afterwards
+    obs_gunzip = obs_filename.endswith(".gz")
+    obs_dl_path = obs_dl_path_final if obs_gunzip else os.path.join(args.output_dir, obs_filename)
 
-    # Fallback if DLR is not found, try GDE (another common AC for MGEX)
-    nav_filename_stem_gde = f"BRDM00GDE_S_{year}{doy_str}0000_01D_MN"
-    nav_filename_rnx_gz_gde = f"{nav_filename_stem_gde}.rnx.gz"
-    nav_url_gde = f"{MGEX_NAV_BASE_URL}/{year}/{doy_str}/{nav_filename_rnx_gz_gde}"
+    # 3. Construct URLs for the Navigation (NAV) file, one per analysis center
+    nav_candidates = []
+    for ac in NAV_CANDIDATES:
+        nav_filename = NAV_PATTERN.format(ac=ac, year=year, doy=doy_str)
+        nav_candidates.append((f"{MGEX_NAV_BASE_URL}/{year}/{doy_str}/{nav_filename}",
+                               os.path.join(args.output_dir, os.path.splitext(nav_filename)[0])))
+    nav_dl_path_final = nav_candidates[0][1]
 
+    # 4. Download OBS and NAV concurrently; the transfers are independent and
+    # network-bound, so wall time is roughly the slowest one.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        obs_future = executor.submit(download_file, obs_url, obs_dl_path, obs_gunzip)
+        nav_future = executor.submit(download_first_available, nav_candidates)
+        obs_ok = obs_future.result()
+        nav_result = nav_future.result()
 
-    nav_dl_path_gz = os.path.join(args.output_dir, nav_filename_rnx_gz)
-    nav_dl_path_final = os.path.join(args.output_dir, f"{nav_filename_stem}.rnx")
+    if obs_ok:
+        obs_ready = decompress_Z_file(obs_dl_path, obs_dl_path_final) if obs_filename.endswith(".Z") else True
+    else:
+        log.error("Failed to download OBS file. Please check URL or try another IGS source if CDDIS is down.")
+        # A file left by an earlier run is complete, as it was only moved into place once fully written
+        obs_ready = os.path.exists(obs_dl_path_final)
 
-    if not download_file(nav_url, nav_dl_path_gz):
-        print(f"Failed to download NAV file with DLR. Trying GDE...")
-        nav_dl_path_gz = os.path.join(args.output_dir, nav_filename_rnx_gz_gde)
-        nav_dl_path_final = os.path.join(args.output_dir, f"{nav_filename_stem_gde}.rnx")
-        if download_file(nav_url_gde, nav_dl_path_gz):
-            decompress_gz_file(nav_dl_path_gz, nav_dl_path_final)
-        else:
-            print(f"Failed to download NAV file with GDE as well. Please check MGEX directory for available BRDM files for {year}/{doy_str} or try a different IGS source.")
+    if nav_result:
+        nav_dl_path_final = nav_result
     else:
-        decompress_gz_file(nav_dl_path_gz, nav_dl_path_final)
-
-    print("\n--- Download process finished. ---")
-    print(f"Please check the '{args.output_dir}' directory for downloaded and decompressed files.")
-    print("Required files for RTKPOST (typically):")
-    print(f"  - Rover OBS: {args.rinex_rover_file}")
-    print(f"  - Base OBS:  {obs_dl_path_final if os.path.exists(obs_dl_path_final) else 'Download/Decompress OBS manually if failed'}")
-    print(f"  - NAV file:  {nav_dl_path_final if os.path.exists(nav_dl_path_final) else 'Download/Decompress NAV manually if failed'}")
+        # Report a NAV file left by an earlier run, whichever analysis center it came from
+        nav_dl_path_final = next((path for _, path in nav_candidates if os.path.exists(path)), nav_dl_path_final)
+        log.error("Failed to download NAV file from any of %s. Please check MGEX directory for available BRDM files for %s/%s or try a different IGS source.", ', '.join(NAV_CANDIDATES), year, doy_str)
+
+    log.info("--- Download process finished. ---")
+    log.info("Please check the '%s' directory for downloaded and decompressed files.", args.output_dir)
+    log.info("Required files for RTKPOST (typically):")
+    log.info("  - Rover OBS: %s", args.rinex_rover_file)
+    log.info("  - Base OBS:  %s", obs_dl_path_final if obs_ready else 'Download/Decompress OBS manually if failed')
+    log.info("  - NAV file:  %s", nav_dl_path_final if os.path.exists(nav_dl_path_final) else 'Download/Decompress NAV manually if failed')
 
 if __name__ == "__main__":
     main()
\ No newline at end of file